@@ -24,18 +24,58 @@
 import re
 import os
 import sys
-import argparse
-import secrets
+import stat
+import functools
 import string
-import shutil
 import signal
-import random
-import ctypes
-from datetime import datetime
+
+try:
+    import re2  # Optional: linear-time regex matching (pip install google-re2)
+except ImportError:
+    re2 = None
+
+# One template line: a Markdown heading or a "VAR=value" assignment. The
+# alternation order makes "### " beat "## " and "# `" beat "# ", and trailing
+# whitespace is left outside every group.
+_TEMPLATE_RE = re.compile(
+    r"""^(?:
+        \#\#\#\ (?P<info>.*\S)
+        | \#\#\ (?P<question>.*\S)
+        | \#\ (?P<regex>`(?:.*\S)?)
+        | \#\ (?P<section>.*\S)
+        | (?P<key>[A-Z0-9_]+)=(?P<default>(?:.*\S)?)
+    )[^\S\n]*$""",
+    re.MULTILINE | re.VERBOSE,
+)
+
+# Random value placeholder (e.g., "random(64)")
+_RANDOM_RE = re.compile(r"random\((\d+)\)")
+
+# Byte-to-character table for random strings; bytes at or above the largest
+# multiple of the alphabet size are rejected so every character is equally likely
+_RANDOM_ALPHABET = (string.ascii_letters + string.digits).encode("ascii")
+_RANDOM_TABLE = bytes(_RANDOM_ALPHABET[b % len(_RANDOM_ALPHABET)] for b in range(256))
+_RANDOM_REJECT = bytes(range(256 - 256 % len(_RANDOM_ALPHABET), 256))
+
+# Longest value accepted at a prompt, so the regex engine never sees huge pastes
+_MAX_INPUT_LENGTH = 4096
+
+# Template regexes that accept any input, so validation can be skipped
+_MATCH_ANYTHING = {".*", "^.*", ".*$", "^.*$"}
+
+# Parsed templates keyed by (path, mtime, size); a changed file gets a new key
+_parse_cache = {}
+_PARSE_CACHE_SIZE = 128
+
+# Whether the console understands ANSI escapes; checked on the first clear
+_ansi_supported = None
+
+# Cached terminal width; cleared on SIGWINCH so the next prompt measures again
+_term_width = None
 
 
 def random_goodbye():
-    messages = [
+    messages = (
         "Goodbye!",
         "See you next time!",
         "Exiting. Have a great day!",
@@ -44,8 +84,8 @@ def random_goodbye():
         "Scaffold signing off!",
         "👋 Goodbye!",
         "Thanks for using Scaffold!",
-    ]
-    return random.choice(messages)
+    )
+    return messages[os.urandom(1)[0] % len(messages)]
 
 
 def handle_exit(signum, frame):
@@ -53,6 +93,11 @@ def handle_exit(signum, frame):
     sys.exit(0)
 
 
+def handle_resize(signum, frame):
+    global _term_width
+    _term_width = None
+
+
 # Register signal handlers at the top-level (before main)
 signal.signal(signal.SIGINT, handle_exit)  # Handle Ctrl+C
 signal.signal(signal.SIGTERM, handle_exit)  # Handle kill/terminate
@@ -60,69 +105,225 @@ signal.signal(signal.SIGTERM, handle_exit)  # Handle kill/terminate
 if hasattr(signal, "SIGHUP"):
     signal.signal(signal.SIGHUP, handle_exit)  # Handle terminal hangup
 
+if hasattr(signal, "SIGWINCH"):
+    signal.signal(signal.SIGWINCH, handle_resize)  # Handle terminal resize
 
-def parse_env_template(filepath) -> dict[str, dict]:
+
+def _terminal_width() -> int:
+    """
+    Returns the terminal width, querying the terminal only after startup or a resize.
+    Without SIGWINCH (e.g. on Windows) nothing signals a resize, so it is queried
+    every time.
     """
-    Parses an environment template file and extracts Markdown structured information
-    into a dictionary suitable for programmatic use.
+    global _term_width
+    if _term_width is None or not hasattr(signal, "SIGWINCH"):
+        import shutil
+
+        try:
+            _term_width = shutil.get_terminal_size((80, 20)).columns
+        except Exception:
+            _term_width = 80
+    return _term_width
+
+
+@functools.lru_cache(maxsize=256)
+def _compile_regex(pattern):
+    """
+    Compiles a template regex, preferring the linear-time RE2 engine when installed.
+    Memoized, so a pattern repeated across variables or parses compiles once.
 
     Args:
-        filepath (str): Path to the .env template file.
+        pattern (str): The regex pattern from the template.
 
     Returns:
-        dict: Mapping of environment variable names to their metadata.
+        Pattern or None: The compiled pattern, or None if the pattern accepts any input.
+
+    Raises:
+        re.error: If the pattern is invalid.
+    """
+    if pattern in _MATCH_ANYTHING:
+        return None
+    if re2 is not None:
+        try:
+            return re2.compile(pattern)
+        except re2.error:
+            # RE2 has no backreferences or lookaround; let re handle those
+            pass
+    return re.compile(pattern)
+
+
+class EnvEntry:
+    """
+    Metadata parsed for a single environment variable. Fields that were never set
+    behave like missing dictionary keys, so an entry also supports entry["question"],
+    "regex" in entry and entry.get("info").
     """
+
+    __slots__ = (
+        "section",
+        "question",
+        "info",
+        "regex",
+        "compiled_regex",
+        "regex_error",
+        "default",
+    )
+
+    def __getitem__(self, key):
+        if key in self.__slots__:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                pass
+        raise KeyError(key)
+
+    def __contains__(self, key):
+        return key in self.__slots__ and hasattr(self, key)
+
+    def get(self, key, default=None):
+        return getattr(self, key, default) if key in self.__slots__ else default
+
+    def __repr__(self):
+        fields = ", ".join(
+            f"{name}={getattr(self, name)!r}"
+            for name in self.__slots__
+            if hasattr(self, name)
+        )
+        return f"EnvEntry({fields})"
+
+
+def _handle_section(entry, text):
+    # Section heading (e.g., "# Section Name")
+    entry.section = text
+
+
+def _handle_question(entry, text):
+    # Question heading (e.g., "## Question?")
+    entry.question = text
+
+
+def _handle_info(entry, text):
+    # Information heading (e.g., "### Info")
+    if "info" in entry:
+        entry.info.append(text)
+    else:
+        entry.info = [text]
+
+
+def _handle_regex(entry, text):
+    # Regex heading (e.g., "# `regex`")
+    regex_pattern = text.strip("`")
+    entry.regex = regex_pattern
     try:
-        with open(filepath) as f:
-            lines = f.readlines()
-    except (OSError, IOError) as e:
-        print(f"Error opening file {filepath}: {e}")
-        return {}
+        entry.compiled_regex = _compile_regex(regex_pattern)
+    except re.error as e:
+        entry.regex_error = f"Invalid regex: {e}"
 
-    temp_markdown = {}
-    final_markdown = {}
-    env_var_pattern = re.compile(r"^([A-Z0-9_]+)=")
 
-    for line in lines:
-        stripped = line.strip()
+# Heading groups of _TEMPLATE_RE mapped to the handler that records them
+_HEADING_DISPATCH = {
+    "info": _handle_info,
+    "question": _handle_question,
+    "regex": _handle_regex,
+    "section": _handle_section,
+}
 
-        # Section heading (e.g., "# Section Name")
-        if stripped.startswith("# ") and len(stripped) > 2 and stripped[2] != "`":
-            temp_markdown["section"] = stripped[2:]
 
-        # Question heading (e.g., "## Question?")
-        elif stripped.startswith("## "):
-            temp_markdown["question"] = stripped[3:]
+def parse_env_template_str(text) -> dict[str, EnvEntry]:
+    """
+    Parses the contents of an environment template and extracts Markdown structured
+    information into a dictionary suitable for programmatic use. Headings and variable
+    assignments must start at the beginning of the line.
 
-        # Information heading (e.g., "### Info")
-        elif stripped.startswith("### "):
-            temp_markdown.setdefault("info", []).append(stripped[4:])
+    Args:
+        text (str): The template contents.
 
-        # Regex heading (e.g., "# `regex`")
-        elif stripped.startswith("# `"):
-            regex_pattern = stripped[2:].strip("`")
-            temp_markdown["regex"] = regex_pattern
-            try:
-                re.compile(regex_pattern)
-            except re.error as e:
-                temp_markdown["regex_error"] = f"Invalid regex: {e}"
+    Returns:
+        dict: Mapping of environment variable names to their EnvEntry metadata.
+    """
+    entry = EnvEntry()
+    final_markdown = {}
+
+    for match in _TEMPLATE_RE.finditer(text):
+        kind = match.lastgroup
+        if kind == "default":
+            entry.default = match.group("default")
 
+            # Hand the collected metadata over and start fresh for the next variable
+            final_markdown[match.group("key")] = entry
+            entry = EnvEntry()
         else:
-            # Check for environment variable assignment (e.g., "VAR=value")
-            match = env_var_pattern.match(stripped)
-            if match:
-                var_name = match.group(1)
-                final_markdown[var_name] = temp_markdown.copy()
-                final_markdown[var_name]["default"] = (
-                    stripped.split("=", 1)[1] if "=" in stripped else None
-                )
-
-                # Clear temp_markdown for the next variable
-                temp_markdown.clear()
+            _HEADING_DISPATCH[kind](entry, match.group(kind))
 
     return final_markdown
 
 
+def parse_env_template_bytes(buf) -> dict[str, EnvEntry]:
+    """
+    Parses the raw contents of an environment template given as UTF-8 bytes.
+
+    Args:
+        buf (bytes-like): The template contents, e.g. bytes or an mmap.
+
+    Returns:
+        dict: Mapping of environment variable names to their EnvEntry metadata.
+    """
+    # Decode straight out of the buffer; invalid bytes become U+FFFD
+    return parse_env_template_str(str(buf, "utf-8", "replace"))
+
+
+def parse_env_template(filepath) -> dict[str, EnvEntry]:
+    """
+    Maps an environment template file into memory and parses it with
+    parse_env_template_bytes. Results are cached until the file's modification
+    time or size changes, so callers must not mutate the returned dictionary.
+
+    Args:
+        filepath (str | bytes | os.PathLike): Path to the .env template file.
+
+    Returns:
+        dict: Mapping of environment variable names to their EnvEntry metadata.
+    """
+    # Accept str, bytes and os.PathLike paths alike
+    filepath = os.fspath(filepath)
+
+    # Reject paths the OS would refuse anyway without raising and unwinding
+    nul = b"\0" if isinstance(filepath, bytes) else "\0"
+    if not filepath or nul in filepath:
+        print(f"Error opening file {filepath!r}: invalid path")
+        return {}
+
+    try:
+        # Devices, FIFOs and directories are never templates; skip them before reading
+        st = os.stat(filepath)
+        if not stat.S_ISREG(st.st_mode):
+            print(f"Error opening file {filepath}: not a regular file")
+            return {}
+
+        cache_key = (filepath, st.st_mtime_ns, st.st_size)
+        if cache_key in _parse_cache:
+            return _parse_cache[cache_key]
+
+        import mmap
+
+        with open(filepath, "rb", buffering=131072) as f:
+            try:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    result = parse_env_template_bytes(mm)
+            except (ValueError, OSError):
+                # Empty files and some filesystems cannot be mapped; read instead
+                result = parse_env_template_bytes(f.read())
+    except (OSError, IOError) as e:
+        print(f"Error opening file {filepath}: {e}")
+        return {}
+
+    # Evict the oldest entry once the cache is full
+    if len(_parse_cache) >= _PARSE_CACHE_SIZE:
+        _parse_cache.pop(next(iter(_parse_cache)))
+    _parse_cache[cache_key] = result
+    return result
+
+
 def generate_secure_random_string(length: int) -> str:
     """
     Generates a cryptographically secure random string of the specified length.
@@ -133,18 +334,102 @@ def generate_secure_random_string(length: int) -> str:
     Returns:
         str: A random string.
     """
-    alphabet = string.ascii_letters + string.digits
-    return "".join(secrets.choice(alphabet) for _ in range(length))
+    import secrets
+
+    result = bytearray()
+    while len(result) < length:
+        # Only 8 of 256 byte values are rejected, so a small margin over the
+        # shortfall almost always finishes in a single read
+        needed = length - len(result)
+        raw = secrets.token_bytes(needed + needed // 16 + 8)
+        result += raw.translate(_RANDOM_TABLE, _RANDOM_REJECT)
+    return result[:length].decode("ascii")
+
+
+def _enable_ansi() -> bool:
+    """
+    Enables ANSI escape sequence processing on the Windows console.
+
+    Returns:
+        bool: True if the terminal understands ANSI escape sequences.
+    """
+    if os.name != "nt":
+        return True
+    try:
+        import ctypes
+
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.GetStdHandle(-11)  # STD_OUTPUT_HANDLE
+        mode = ctypes.c_uint32()
+        if not kernel32.GetConsoleMode(handle, ctypes.byref(mode)):
+            return False
+        # ENABLE_VIRTUAL_TERMINAL_PROCESSING (Windows 10+)
+        return bool(kernel32.SetConsoleMode(handle, mode.value | 0x0004))
+    except Exception:
+        return False
+
+
+def _expand_random(value) -> str:
+    """
+    Replaces a "random" or "random(n)" placeholder with a secure random string.
+
+    Args:
+        value (str): The entered or default value.
+
+    Returns:
+        str: A random string for placeholders, otherwise the value unchanged.
+    """
+    if not value.startswith("random"):
+        return value
+    match = _RANDOM_RE.match(value)
+    length = int(match.group(1)) if match else 32
+    return generate_secure_random_string(length)
 
 
 def clear() -> None:
     """
     Clears the terminal screen based on the operating system.
     """
-    # Attempt to clear the terminal in a cross-platform way
-    clear_cmd = "cls" if os.name == "nt" else "clear"
-    if sys.stdout.isatty():
-        os.system(clear_cmd)
+    global _ansi_supported
+    if not sys.stdout.isatty():
+        return
+
+    if _ansi_supported is None:
+        _ansi_supported = _enable_ansi()
+
+    if _ansi_supported:
+        # Clear screen and scrollback, then home the cursor, without spawning a shell
+        sys.stdout.write("\x1b[H\x1b[2J\x1b[3J")
+        sys.stdout.flush()
+    else:
+        os.system("cls" if os.name == "nt" else "clear")
+
+
+@functools.lru_cache(maxsize=256)
+def _render_box_body(content_lines, term_width) -> tuple:
+    """
+    Renders the sides and bottom of the prompt box. Memoized, since variables
+    without their own headings all share the same placeholder content.
+
+    Args:
+        content_lines (tuple): The question, a blank spacer and the info lines.
+        term_width (int): The terminal width to center the box in.
+
+    Returns:
+        tuple: The box width, the centering margin and the rendered lines.
+    """
+    max_line_length = max(len(line) for line in content_lines)
+    box_width = min(max_line_length + 4, term_width - 2)
+    bottom = f"└{'─' * max(1, box_width - 2)}┘"
+
+    # Center the whole box with one shared margin
+    margin = " " * max(0, (term_width - box_width) // 2)
+    box_lines = [
+        margin + "│" + line.center(box_width - 2) + "│" for line in content_lines
+    ]
+    box_lines.append(margin + bottom)
+    return box_width, margin, "\n".join(box_lines) + "\n"
+
 
 def prompt(var, data, current_question=None, total_questions=None) -> str:
     """
@@ -164,15 +449,11 @@ def prompt(var, data, current_question=None, total_questions=None) -> str:
     question = data.get("question", "No question provided")
     info_lines = data.get("info", []) or ["No additional info provided"]
 
-    try:
-        term_width = shutil.get_terminal_size((80, 20)).columns
-    except Exception:
-        term_width = 80
+    term_width = _terminal_width()
 
-    box_lines = []
-    content_lines = [question] + [""] + info_lines
-    max_line_length = max(len(line) for line in content_lines)
-    box_width = min(max_line_length + 4, term_width - 2)
+    box_width, margin, body = _render_box_body(
+        (question, "", *info_lines), term_width
+    )
 
     indicator = ""
     if current_question is not None and total_questions is not None:
@@ -182,36 +463,66 @@ def prompt(var, data, current_question=None, total_questions=None) -> str:
     else:
         horizontal = "─" * max(1, box_width - 2)
         top = f"┌{horizontal}┐"
-    bottom = f"└{'─' * max(1, box_width - 2)}┘"
 
-    box_lines.append(top)
-    for line in content_lines:
-        padded = line.center(box_width - 2)
-        box_lines.append(f"│{padded}│")
-    box_lines.append(bottom)
-
-    for line in box_lines:
-        print(line.center(term_width))
+    # Draw the whole box in a single write
+    sys.stdout.write(margin + top + "\n" + body)
 
     prompt_str = f"{var} (default: {user_value}): "
     left_padding = max(0, (term_width - len(prompt_str)) // 2)
-    input_str = input(" " * left_padding + prompt_str).strip() or user_value
-
-    if input_str.startswith("random"):
-        match = re.match(r"random\((\d+)\)", input_str)
-        length = int(match.group(1)) if match else 32
-        input_str = generate_secure_random_string(length)
-
-    if "regex" in data:
-        while not re.fullmatch(data["regex"], input_str):
-            print(f"Input does not match regex: {data['regex']}".center(term_width))
-            input_str = input(" " * left_padding + prompt_str).strip() or user_value
-            
+    prompt_line = " " * left_padding + prompt_str
+
+    # Resolve the validator once, before any input is read
+    if "compiled_regex" in data:
+        pattern = data["compiled_regex"]
+    elif "regex" in data:
+        pattern = _compile_regex(data["regex"])
+    else:
+        pattern = None
+    error_line = f"Input does not match regex: {data.get('regex')}".center(term_width)
+    too_long_line = f"Input is too long (max {_MAX_INPUT_LENGTH} characters)".center(
+        term_width
+    )
+
+    while True:
+        input_str = input(prompt_line).strip()
+        if not input_str:
+            # The default comes from the template itself, so it is not re-validated
+            input_str = _expand_random(user_value)
+            break
+        if len(input_str) > _MAX_INPUT_LENGTH:
+            print(too_long_line)
+            continue
+
+        input_str = _expand_random(input_str)
+        if pattern is None or pattern.fullmatch(input_str):
+            break
+        print(error_line)
+
     clear()
 
     return input_str
 
 
+def _compute_max_env_size() -> int:
+    """
+    Determines the maximum size of the environment block for this system.
+
+    Returns:
+        int: The maximum environment size in bytes.
+    """
+    if os.name == "nt":
+        # On Windows, the maximum size of the environment block is 32767 characters
+        return 32767
+    try:
+        return os.sysconf("SC_ARG_MAX")
+    except (AttributeError, ValueError, OSError):
+        return 131072  # Fallback to 128K if sysconf not available
+
+
+# The limit is fixed for the running kernel, so query it once at import
+_MAX_ENV_SIZE = _compute_max_env_size()
+
+
 def main():
     """
     Main entry point for the .env template parser and generator.
@@ -237,6 +548,8 @@ def main():
             sys.exit(1)
     else:
         try:
+            import ctypes
+
             is_admin = ctypes.windll.shell32.IsUserAnAdmin() != 0
         except Exception:
             is_admin = False
@@ -246,6 +559,8 @@ def main():
             )
             sys.exit(1)
 
+    import argparse
+
     parser = argparse.ArgumentParser(
         description="Parse a .env template file with Markdown structure."
     )
@@ -259,6 +574,12 @@ def main():
     parser.add_argument(
         "-d", "--debug", action="store_true", help="Enable debug output"
     )
+    parser.add_argument(
+        "-y",
+        "--accept-defaults",
+        action="store_true",
+        help="Use the template defaults for every variable without prompting",
+    )
     args = parser.parse_args()
 
     print(f"Parsing file: {args.filename}")
@@ -284,28 +605,31 @@ def main():
             print()
             print("-" * 40)
 
-    env_file_content = []
-    total_questions = len(parsed_env)
-    for idx, (var, data) in enumerate(parsed_env.items(), 1):
-        user_input = prompt(var, data, idx, total_questions)
-        env_file_content.append(f"{var}={user_input}")
-
-    env_file_string = os.linesep.join(env_file_content)
+    # Each line is encoded once; the byte counts drive the size check and the
+    # bytes are written as-is
+    if args.accept_defaults:
+        env_file_content = [
+            (var + "=" + _expand_random(data.get("default", ""))).encode("utf-8")
+            for var, data in parsed_env.items()
+        ]
+    else:
+        total_questions = len(parsed_env)
+        env_file_content = [b""] * total_questions
+        for idx, (var, data) in enumerate(parsed_env.items()):
+            user_input = prompt(var, data, idx + 1, total_questions)
+            env_file_content[idx] = (var + "=" + user_input).encode("utf-8")
+    line_sep = os.linesep.encode("utf-8")
 
     # Collect messages to write as comments
     env_comments = []
 
     # Check environment variable size limit
-    if os.name == "nt":
-        # On Windows, the maximum size of the environment block is 32767 characters
-        max_env_size = 32767
-    else:
-        try:
-            max_env_size = os.sysconf("SC_ARG_MAX")
-        except (AttributeError, ValueError):
-            max_env_size = 131072  # Fallback to 128K if sysconf not available
+    max_env_size = _MAX_ENV_SIZE
 
-    env_length = len(env_file_string.encode("utf-8"))
+    # Measure without joining, so an aborted run never builds the full file
+    env_length = sum(map(len, env_file_content)) + len(line_sep) * (
+        len(env_file_content) - 1
+    )
     size_msg = f"Total environment file size: {env_length} bytes (system max: {max_env_size} bytes)"
     print(size_msg)
     env_comments.append(f"# {size_msg}")
@@ -341,17 +665,22 @@ def main():
             print("Aborted. File not overwritten.")
             return
 
+    from datetime import datetime
+
+    now = datetime.now().strftime("%m/%d/%Y %H:%M:%S")
+    header = [
+        f"# Generated by Scaffold Environment Generator on {now}",
+        "# Do not edit this file directly; use the template instead.",
+        *env_comments,
+    ]
+    payload = line_sep.join(
+        [line.encode("utf-8") for line in header] + env_file_content
+    )
+
     try:
-        with open(output_filename, "w") as f:
-            now = datetime.now().strftime("%m/%d/%Y %H:%M:%S")
-            f.write(
-                f"# Generated by Scaffold Environment Generator on {now}{os.linesep}"
-            )
-            f.write(
-                f"# Do not edit this file directly; use the template instead.{os.linesep}"
-            )
-            f.write(os.linesep.join(env_comments) + os.linesep)
-            f.write(env_file_string)
+        # Binary mode: lines already end in os.linesep, so skip newline translation
+        with open(output_filename, "wb") as f:
+            f.write(payload)
         print(f"Environment file written to '{output_filename}'.")
     except (OSError, IOError) as e:
         print(f"Error writing to file '{output_filename}': {e}")
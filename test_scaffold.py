@@ -1,10 +1,30 @@
 import os
 import sys
-import tempfile
 import pytest
-import tempfile
 import builtins
-from scaffold import parse_env_template, generate_secure_random_string, main
+from scaffold import (
+    parse_env_template,
+    parse_env_template_str,
+    generate_secure_random_string,
+    main,
+)
+
+
+@pytest.fixture
+def write_template(tmp_path_factory):
+    # Write template content to a fresh file; pytest removes the directories in bulk
+    def _write(content):
+        path = tmp_path_factory.mktemp("template") / ".env.template"
+        path.write_text(content)
+        return str(path)
+
+    return _write
+
+
+def feed_input(monkeypatch, *values):
+    # Answer successive input() calls with the given values
+    inputs = iter(values)
+    monkeypatch.setattr(builtins, "input", lambda *args, **kwargs: next(inputs))
 
 
 def test_root_detection(monkeypatch):
@@ -19,7 +39,7 @@ def test_root_detection(monkeypatch):
                 return True
         class DummyWindll:
             shell32 = DummyShell32()
-        monkeypatch.setattr(scaffold, "ctypes", type("ctypes", (), {"windll": DummyWindll()}))
+        monkeypatch.setitem(sys.modules, "ctypes", type("ctypes", (), {"windll": DummyWindll()}))
         with pytest.raises(SystemExit) as excinfo:
             scaffold.main()
         assert excinfo.value.code == 1
@@ -30,23 +50,40 @@ def test_root_detection(monkeypatch):
         assert excinfo.value.code == 1
 
 
-def test_parse_env_template_basic():
+def test_parse_env_template_basic(write_template):
     content = """
 # Section 1
 ## What is the API key?
 ### This is your API key for service X.
 API_KEY=defaultkey
 """
-    with tempfile.NamedTemporaryFile(mode="w+", delete=False) as tf:
-        tf.write(content)
-        tf.flush()
-        result = parse_env_template(tf.name)
-    os.unlink(tf.name)
+    result = parse_env_template(write_template(content))
     assert "API_KEY" in result
     assert result["API_KEY"]["section"] == "Section 1"
     assert result["API_KEY"]["question"] == "What is the API key?"
     assert result["API_KEY"]["info"] == ["This is your API key for service X."]
     assert result["API_KEY"]["default"] == "defaultkey"
+    assert result["API_KEY"].section == "Section 1"
+    assert "regex" not in result["API_KEY"]
+
+
+def test_parse_env_template_path_like(tmp_path):
+    path = tmp_path / ".env.template"
+    path.write_text("## Name?\nNAME=app\n")
+    assert list(parse_env_template(path)) == ["NAME"]
+    assert list(parse_env_template(os.fsencode(path))) == ["NAME"]
+    assert parse_env_template(b"bad\0path") == {}
+
+
+def test_parse_env_template_cache(write_template):
+    path = write_template("FIRST=1\n")
+    result = parse_env_template(path)
+    assert parse_env_template(path) is result
+
+    # A changed file is parsed again
+    with open(path, "a") as f:
+        f.write("SECOND=2\n")
+    assert list(parse_env_template(path)) == ["FIRST", "SECOND"]
 
 
 def test_parse_env_template_with_regex():
@@ -56,14 +93,22 @@ def test_parse_env_template_with_regex():
 # `^[0-9]+$`
 NUMBER=42
 """
-    with tempfile.NamedTemporaryFile(mode="w+", delete=False) as tf:
-        tf.write(content)
-        tf.flush()
-        result = parse_env_template(tf.name)
-    os.unlink(tf.name)
+    result = parse_env_template_str(content)
     assert "NUMBER" in result
     assert result["NUMBER"]["regex"] == "^[0-9]+$"
     assert result["NUMBER"]["default"] == "42"
+    assert result["NUMBER"]["compiled_regex"].fullmatch("123")
+
+    # The compiled pattern is cached and shared between parses
+    again = parse_env_template_str(content)
+    assert again["NUMBER"]["compiled_regex"] is result["NUMBER"]["compiled_regex"]
+
+
+@pytest.mark.parametrize("pattern", [".*", "^.*$"])
+def test_parse_env_template_match_anything_regex(pattern):
+    result = parse_env_template_str(f"# `{pattern}`\nANY=value\n")
+    assert result["ANY"]["regex"] == pattern
+    assert result["ANY"]["compiled_regex"] is None
 
 
 def test_parse_env_template_with_invalid_regex():
@@ -73,11 +118,7 @@ def test_parse_env_template_with_invalid_regex():
 # `^[0-9+($`
 INVALID_VAR=oops
 """
-    with tempfile.NamedTemporaryFile(mode="w+", delete=False) as tf:
-        tf.write(content)
-        tf.flush()
-        result = parse_env_template(tf.name)
-    os.unlink(tf.name)
+    result = parse_env_template_str(content)
     assert "INVALID_VAR" in result
     assert result["INVALID_VAR"]["regex"] == "^[0-9+($"
     assert "regex_error" in result["INVALID_VAR"]
@@ -125,18 +166,21 @@ def test_parse_env_template_malicious_content():
 ### Info
 MALICIOUS_VAR=$(rm -rf /)
 """
-    with tempfile.NamedTemporaryFile(mode="w+", delete=False) as tf:
-        tf.write(content)
-        tf.flush()
-        result = parse_env_template(tf.name)
-    os.unlink(tf.name)
+    result = parse_env_template_str(content)
 
     # The parser should treat this as a string, not execute anything
     assert "MALICIOUS_VAR" in result
     assert result["MALICIOUS_VAR"]["default"] == "$(rm -rf /)"
 
 
-def test_prompt_rejects_malicious_input(monkeypatch):
+@pytest.mark.parametrize(
+    "bad_inputs",
+    [
+        ["bad; rm -rf /", "another bad; cat ../../../etc/passwd"],
+        ["A" * 5000],  # matches the regex but exceeds the length cap
+    ],
+)
+def test_prompt_rejects_malicious_input(monkeypatch, bad_inputs):
     # Simulate user input that looks like a shell injection
     from scaffold import prompt
 
@@ -148,38 +192,38 @@ def test_prompt_rejects_malicious_input(monkeypatch):
     }
 
     # Should keep prompting, so after one bad input, give a good one
-    inputs = iter(
-        ["bad; rm -rf /", "another bad; cat ../../../etc/passwd", "SAFE_VALUE"]
-    )
-    monkeypatch.setattr("builtins.input", lambda _: next(inputs))
+    feed_input(monkeypatch, *bad_inputs, "SAFE_VALUE")
     value = prompt("MALICIOUS_VAR", data)
     assert value == "SAFE_VALUE"
 
 @pytest.mark.skipif(os.name == "nt", reason="Not applicable on Windows")
-def test_env_size_limit(monkeypatch):
+def test_env_size_limit(monkeypatch, write_template):
     # Prepare a large env string to exceed the limit
     var_count = 1000
     long_value = "A" * 200
     env_lines = [f"VAR{i}={long_value}" for i in range(var_count)]
 
     # Write a temporary .env.template file
-    with tempfile.NamedTemporaryFile("w+", delete=False) as tf:
-        for line in env_lines:
-            tf.write(f"{line}\n")
-        tf.flush()
-        template_path = tf.name
+    template_path = write_template("\n".join(env_lines) + "\n")
 
     # Patch sys.argv to use the template file
     monkeypatch.setattr(sys, "argv", ["scaffold.py", "-f", template_path])
 
     # Patch input to always accept defaults, then 'n' to abort when asked to continue
-    inputs = iter([""] * var_count + ["test.env", "n"])
-    monkeypatch.setattr(builtins, "input", lambda *args, **kwargs: next(inputs))
+    answered = 0
+    tail = iter(["test.env", "n"])
 
-    # Patch os.sysconf to return a small limit to force the warning
-    monkeypatch.setattr(
-        os, "sysconf", lambda name: 1024 if name == "SC_ARG_MAX" else 131072
-    )
+    def _input(*args, **kwargs):
+        nonlocal answered
+        answered += 1
+        return "" if answered <= var_count else next(tail)
+
+    monkeypatch.setattr(builtins, "input", _input)
+
+    # Patch the cached system limit to a small value to force the warning
+    import scaffold
+
+    monkeypatch.setattr(scaffold, "_MAX_ENV_SIZE", 1024)
 
     # Capture output
     from io import StringIO
@@ -192,7 +236,6 @@ def test_env_size_limit(monkeypatch):
         main()
     finally:
         sys.stdout = sys_stdout
-        os.unlink(template_path)
 
     output = out.getvalue()
     assert "Warning: The environment file size" in output
@@ -201,6 +244,38 @@ def test_env_size_limit(monkeypatch):
     )
 
 
+def test_accept_defaults(monkeypatch, write_template, tmp_path):
+    template_path = write_template("NAME=app\nSECRET=random(12)\n")
+    output_path = tmp_path / "out.env"
+    monkeypatch.setattr(
+        sys, "argv", ["scaffold.py", "-f", template_path, "--accept-defaults"]
+    )
+
+    # Only the output filename is asked for
+    feed_input(monkeypatch, str(output_path))
+    main()
+
+    lines = output_path.read_text().splitlines()
+    assert "NAME=app" in lines
+    secret = next(line for line in lines if line.startswith("SECRET="))
+    assert len(secret) == len("SECRET=") + 12
+
+
+def test_terminal_width_without_sigwinch(monkeypatch):
+    import shutil
+    import types
+    import scaffold
+
+    # No SIGWINCH means no resize notification, so the width must not be cached
+    monkeypatch.setattr(scaffold, "signal", types.SimpleNamespace())
+    monkeypatch.setattr(scaffold, "_term_width", None)
+    monkeypatch.setattr(shutil, "get_terminal_size", lambda *a: os.terminal_size((100, 20)))
+    assert scaffold._terminal_width() == 100
+
+    monkeypatch.setattr(shutil, "get_terminal_size", lambda *a: os.terminal_size((60, 20)))
+    assert scaffold._terminal_width() == 60
+
+
 def test_generate_secure_random_string_length():
     s = generate_secure_random_string(16)
     assert isinstance(s, str)
@@ -213,6 +288,11 @@ def test_generate_secure_random_string_uniqueness():
     assert s1 != s2
 
 
+def test_generate_secure_random_string_alphabet():
+    s = generate_secure_random_string(256)
+    assert s.isascii() and s.isalnum()
+
+
 def test_parse_env_template_invalid_file():
     result = parse_env_template("/nonexistent/file/path.env")
     assert result == {}